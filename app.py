@@ -1,12 +1,68 @@
-import os, io, csv, time
-from typing import List, Dict
+import os, html, time, uuid, random, threading
+from typing import List, Dict, Tuple, Iterable, Sequence
+from itertools import chain
+from collections import deque
+from types import MappingProxyType
 import streamlit as st
-from pandas import DataFrame
 import asyncio
+import concurrent.futures
+from urllib.parse import quote_plus
 
 # --- Page setup
 st.set_page_config(page_title="Depop Scraper", page_icon="🎢", layout="wide")
 
+IS_CLOUD = bool(os.environ.get("STREAMLIT_RUNTIME"))
+
+# --- Session defaults (read-only module constant; only missing keys are seeded each rerun)
+_DEFAULTS = MappingProxyType({
+    "query": "Supreme Box Logo",
+    "deep": True,
+    "secrets_ok": False,
+    "local_creds_ok": False,
+    "creds_checked": False,
+    "row_tuples": (),
+    "brand_count": 0,
+    "last_sheet": "",
+    "csv_name": "depop.csv",
+    "scrape_id": "",
+})
+_missing = _DEFAULTS.keys() - st.session_state.keys()
+if _missing:
+    st.session_state.update({k: _DEFAULTS[k] for k in _missing})
+
+# --- Ensure Playwright Chromium (once per process, skipped when already installed)
+# Probe/install helpers live in depop_scraper_lib; without it (no Playwright) there is nothing to install
+try:
+    from depop_scraper_lib import chromium_installed, install_chromium, playwright_version
+except Exception:
+    chromium_installed = install_chromium = playwright_version = None
+
+# Run is held back while the install thread is alive, but never for longer than this
+CHROMIUM_INSTALL_WAIT_S = 180
+
+@st.cache_resource(show_spinner=False)
+def ensure_chromium(playwright_version: str) -> Tuple[threading.Thread, float] | None:
+    """
+    Starts the Chromium install in a daemon thread at most once per process, so the
+    first render doesn't wait on it; returns the thread and its start time (monotonic).
+    Returns None when Chromium is already present.
+    Keyed by the Playwright version so an upgrade triggers a fresh install.
+    """
+    if install_chromium is None or chromium_installed():
+        return None
+    t = threading.Thread(target=install_chromium, name="chromium-install", daemon=True)
+    t.start()
+    return t, time.monotonic()
+
+_chromium_install = ensure_chromium(playwright_version() if playwright_version else "")
+
+def chromium_ready() -> bool:
+    """True once the install thread has finished, or after CHROMIUM_INSTALL_WAIT_S even if it hasn't."""
+    if _chromium_install is None:
+        return True
+    thread, started = _chromium_install
+    return not thread.is_alive() or time.monotonic() - started > CHROMIUM_INSTALL_WAIT_S
+
 # --- First-time help text
 FIRST_TIME_HELP = """
 **Quick Setup Guide**  
@@ -15,25 +71,132 @@ FIRST_TIME_HELP = """
 3. **Run**: Enter a search term and click "Run Scrape" to start collecting data
 """
 
+# --- Result columns: row dict keys and their display headers (CSV / Sheets)
+ROW_KEYS = ["platform", "brand", "item_name", "price", "size", "condition", "link"]
+SHEET_HEADERS = ["Platform", "Brand", "Item Name", "Price", "Size", "Condition", "Link"]
+PREVIEW_ROWS = 500  # rows shown in the Data Table tab unless "Show all" is on
+# Repeat runs of the same search (same query, deep flag and limits) within this window
+# reuse the earlier result instead of driving Playwright again.
+SCRAPE_CACHE_TTL_S = 600
+# Display headers for st.dataframe; links render as clickable cells
+TABLE_COLUMNS = {**dict(zip(ROW_KEYS, SHEET_HEADERS)), "link": st.column_config.LinkColumn("Link")}
+_PLATFORM, _BRAND, _NAME, _PRICE, _LINK = (
+    ROW_KEYS.index(k) for k in ("platform", "brand", "item_name", "price", "link")
+)
+
+def finalize_rows(rows: List[Dict]) -> Tuple[List[tuple], int]:
+    """
+    Single pass over the scraper's row dicts: resolves each column once (missing/None -> "",
+    whitespace stripped, platform defaults to Depop) into column-ordered tuples, which the
+    Sheets payload, table and CSV all share, and counts distinct non-empty brands on the way.
+    Listings seen twice (same link, or same brand/name/price when there's no link) are dropped.
+    """
+    out: List[tuple] = []
+    append = out.append
+    brands = set()
+    add_brand = brands.add
+    seen = set()
+    add_seen = seen.add
+    for r in rows:
+        r_get = r.get
+        row = [(r_get(k) or "").strip() for k in ROW_KEYS]
+        key = row[_LINK] or (row[_BRAND], row[_NAME], row[_PRICE])
+        if key in seen:
+            continue
+        add_seen(key)
+        if not row[_PLATFORM]:
+            row[_PLATFORM] = "Depop"
+        add_brand(row[_BRAND])
+        append(tuple(row))
+    brands.discard("")
+    return out, len(brands)
+
+# The cached builders below are keyed on the scrape's id; the leading underscore keeps
+# Streamlit from hashing every row tuple on each rerun just to find the cache entry.
+@st.cache_data(show_spinner=False, max_entries=16)
+def rows_to_table(scrape_id: str, _table_rows: List[tuple]):
+    """
+    Results table for the Data Table tab, built column-wise as an Arrow table
+    (what st.dataframe serializes to anyway). Cached so reruns don't rebuild it.
+    Falls back to a pandas DataFrame built from the row tuples if pyarrow is missing.
+    """
+    try:
+        import pyarrow as pa  # ships with Streamlit
+    except ImportError:
+        from pandas import DataFrame
+        return DataFrame.from_records(_table_rows, columns=ROW_KEYS, coerce_float=False)
+    return pa.table({k: list(col) for k, col in zip(ROW_KEYS, zip(*_table_rows))})
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def rows_to_csv(scrape_id: str, _table_rows: List[tuple]) -> bytes:
+    """
+    CSV bytes for the download tab; cached so tab switches and reruns don't re-encode.
+    Serializes the same (cached) table the Data Table tab shows, in one native call.
+    """
+    table = rows_to_table(scrape_id, _table_rows)
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        return table.to_csv(index=False, header=SHEET_HEADERS).encode("utf-8")
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(table.rename_columns(SHEET_HEADERS), sink)
+    return sink.getvalue().to_pybytes()
+
+# --- Static page markup (module constants; st.html skips the Markdown pipeline)
+_GLOBAL_CSS = """
+<style>
+    .main-header {
+        font-size: 36px;
+        text-align: center;
+        font-weight: bold;
+    }
+    .subheader {
+        font-size: 20px;
+        text-align: center;
+    }
+</style>
+"""
+
+_HEADER_HTML = """
+<div class="main-header">🎢 Depop Scraper</div>
+<div class="subheader">Search Depop listings and export to Google Sheets</div>
+"""
+
 # --- Helpers to render UI sections
+_METRICS_HTML = """
+<div class="metric-grid">
+    <div class="metric-card"><div class="metric-label">Items Found</div><div class="metric-value">{items}</div></div>
+    <div class="metric-card"><div class="metric-label">Saved to</div><div class="metric-value">{sheet}</div></div>
+    <div class="metric-card"><div class="metric-label">Unique Brands</div><div class="metric-value">{brands}</div></div>
+</div>
+"""
+
+_HEADER_BLOCK = _GLOBAL_CSS + _HEADER_HTML  # styles + title in one element
+
 def render_header():
-    st.markdown("""
-        <style>
-            .main-header {
-                font-size: 36px;
-                text-align: center;
-                font-weight: bold;
-            }
-            .subheader {
-                font-size: 20px;
-                text-align: center;
-            }
-        </style>
-        <div class="main-header">🎢 Depop Scraper</div>
-        <div class="subheader">Search Depop listings and export to Google Sheets</div>
-    """, unsafe_allow_html=True)
+    st.html(_HEADER_BLOCK)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _health_probe() -> dict:
+    """Filesystem checks for the System Status tab, refreshed at most once a minute."""
+    return {
+        "creds_json": os.path.exists("credentials.json"),
+        "chromium": bool(chromium_installed and chromium_installed()),
+    }
+
+# System Status credential badges (element function + message), keyed by status
+_CREDS_BADGES = MappingProxyType({
+    "unchecked": (st.info, "🔐 Credentials are checked when a scrape is saved"),
+    "secrets": (st.success, "🔐 Secrets OK — using [google_service_account] (TOML table)"),
+    "local": (st.info, "🔐 Using local credentials.json"),
+    "missing": (st.error, "🔴 No Credentials Found"),
+})
 
 # --- UI Panels and Display
+# Fragment: typing a query or flipping Deep Fetch reruns only this block. The button
+# records the request and asks for a full-app rerun, where the scrape branch picks it up.
+@st.fragment
 def render_search_controls():
     st.markdown("#### 🔍 Search Configuration")
     col1, col2, col3 = st.columns([3, 1.2, 1.5], vertical_alignment="bottom")
@@ -41,19 +204,21 @@ def render_search_controls():
     with col1:
         st.session_state.query = st.text_input(
             "What are you looking for?",
-            value=st.session_state.get("query", "Supreme Box Logo"),
+            value=st.session_state.query,
             placeholder="e.g., Palace hoodie, Stone Island jacket, Carhartt pants...",
         )
 
     with col2:
         st.session_state.deep = st.toggle(
             "🔬 Deep Fetch",
-            value=st.session_state.get("deep", True),
+            value=st.session_state.deep,
             help="Extract detailed size and condition data (slower but more complete)"
         )
 
     with col3:
-        st.session_state.run = st.button("🚀 Start Scraping", use_container_width=True, type="primary")
+        if st.button("🚀 Start Scraping", use_container_width=True, type="primary"):
+            st.session_state["run_requested"] = True
+            st.rerun()
 
 def render_info_section():
     tab1, tab2 = st.tabs(["📋 Setup Guide", "🔧 System Status"])
@@ -66,286 +231,408 @@ def render_info_section():
 
         with col1:
             st.write("**Environment**")
-            st.info("✅ Playwright: Auto-installed")
-            st.info("✅ Local credentials.json found" if os.path.exists("credentials.json") else "ℹ️ Using cloud credentials")
+            if not chromium_ready():
+                st.info("⏳ Playwright: installing Chromium…")
+                probe = {"creds_json": os.path.exists("credentials.json")}  # don't cache a mid-install probe
+            else:
+                probe = _health_probe()
+                if probe["chromium"]:
+                    st.info("✅ Playwright: Chromium installed")
+                else:
+                    st.warning("⚠️ Playwright: Chromium not found — the install may have failed")
+            st.info("✅ Local credentials.json found" if probe["creds_json"] else "ℹ️ Using cloud credentials")
 
             # 🔐 Creds status only here (and hidden on Cloud)
-            IS_CLOUD = bool(os.environ.get("STREAMLIT_RUNTIME"))
             if not IS_CLOUD:
-                if st.session_state.get("secrets_ok"):
-                    st.success("🔐 Secrets OK — using [google_service_account] (TOML table)")
-                elif st.session_state.get("local_creds_ok"):
-                    st.info("🔐 Using local credentials.json")
+                ss = st.session_state
+                if not ss.creds_checked:
+                    status = "unchecked"
                 else:
-                    st.error("🔴 No Credentials Found")
+                    status = "secrets" if ss.secrets_ok else "local" if ss.local_creds_ok else "missing"
+                show, msg = _CREDS_BADGES[status]
+                show(msg)
 
         with col2:
             st.write("**Module Status**")
-            try:
-                import creds_loader  # noqa: F401
+            # Reuse the module-level import results instead of re-importing every rerun
+            if authorize_gspread is not None:
                 st.success("✅ Google Sheets integration ready")
-            except Exception:
+            else:
                 st.warning("⚠️ Google Sheets integration unavailable")
 
-            try:
-                import depop_scraper_lib  # noqa: F401
+            if scrape_depop_async is not None:
                 st.success("✅ Scraper module loaded")
-            except Exception:
+            else:
                 st.warning("⚠️ Scraper module unavailable")
 
-def render_results(rows: List[Dict], sheet_name: str):
+@st.fragment
+def render_table(scrape_id: str, table_rows: List[tuple]):
+    """Data Table tab body; its own fragment so the "Show all" toggle reruns only the table."""
+    # Send a preview to the browser by default; CSV and Sheets always get every row
+    table = rows_to_table(scrape_id, table_rows)
+    show_all = len(table_rows) <= PREVIEW_ROWS or st.toggle(f"Show all {len(table_rows)} rows (slower)", value=False)
+    st.dataframe(
+        table if show_all else table[:PREVIEW_ROWS],
+        use_container_width=True, height=400, hide_index=True, column_config=TABLE_COLUMNS,
+    )
+
+@st.fragment
+def render_results(scrape_id: str, table_rows: List[tuple], sheet_name: str, brand_count: int, csv_name: str):
+    """Only called with a non-empty table_rows; the empty state is handled at the call site."""
     st.markdown("#### 📊 Results")
 
-    st.markdown(f"""
-    <div class="metric-grid">
-        <div class="metric-card">
-            <div class="metric-label">Items Found</div>
-            <div class="metric-value">{len(rows)}</div>
-        </div>
-        <div class="metric-card">
-            <div class="metric-label">Saved to</div>
-            <div class="metric-value">{sheet_name}</div>
-        </div>
-        <div class="metric-card">
-            <div class="metric-label">Unique Brands</div>
-            <div class="metric-value">{len({r.get('brand','').strip() for r in rows if r.get('brand')})}</div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(_METRICS_HTML.format(items=len(table_rows), sheet=html.escape(sheet_name), brands=brand_count))
 
     tab1, tab2, tab3 = st.tabs(["📄 Data Table", "💾 Download", "📝 Activity Log"])
 
     with tab1:
-        if rows:
-            df = DataFrame(rows, columns=["platform", "brand", "item_name", "price", "size", "condition", "link"])
-            st.dataframe(df, use_container_width=True, height=400)
-        else:
-            st.info("No data to display yet. Run a search to see results here.")
+        render_table(scrape_id, table_rows)
 
     with tab2:
-        if rows:
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(["Platform", "Brand", "Item Name", "Price", "Size", "Condition", "Link"])
-            for row in rows:
-                writer.writerow([
-                    row.get("platform", ""), row.get("brand", ""), row.get("item_name", ""),
-                    row.get("price", ""), row.get("size", ""), row.get("condition", ""), row.get("link", "")
-                ])
-
-            st.download_button(
-                label="📥 Download as CSV",
-                data=output.getvalue().encode("utf-8"),
-                file_name=f"depop_{st.session_state.query.replace(' ', '_')}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
-        else:
-            st.info("Run a search first to enable downloads.")
+        st.download_button(
+            label="📥 Download as CSV",
+            data=rows_to_csv(scrape_id, table_rows),
+            file_name=csv_name,
+            mime="text/csv",
+            on_click="ignore",  # download without rerunning the app
+            use_container_width=True
+        )
 
     with tab3:
         logs = st.session_state.get("logs", [])
         if logs:
-            st.code("\n".join(logs), language="text")
+            st.text("\n".join(logs))  # plain text: no client-side syntax highlighting
         else:
             st.info("Activity logs will appear here during scraping.")
 
 # --- Import helpers
+# gspread is already loaded by creds_loader, so it's imported here once with it
+# rather than inside the Sheets helpers; pandas stays a lazy, fallback-only import.
 try:
-    from creds_loader import authorize_gspread
+    import gspread
+    from gspread.utils import absolute_range_name
+    from creds_loader import authorize_gspread, clear_cached_clients
 except Exception:
     authorize_gspread = None
 
 try:
-    from depop_scraper_lib import scrape_depop
+    from depop_scraper_lib import scrape_depop_async
 except Exception:
-    scrape_depop = None
+    scrape_depop_async = None
 
-# --- Sidebar Configuration
-with st.sidebar:
-    st.markdown("#### ⚙️ Settings")
+# creds_loader caches the authorized client per process and credential preference
+def get_gspread_client(prefer_local: bool):
+    return authorize_gspread(prefer_local=prefer_local)
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def _open_sheet(prefer_local: bool, sheet_name: str):
+    """Opens (or creates) the spreadsheet; shared by every tab so the Drive title lookup runs once."""
+    gc = get_gspread_client(prefer_local)
+    try:
+        return gc.open(sheet_name)
+    except gspread.SpreadsheetNotFound:
+        return gc.create(sheet_name)
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def _get_ws(prefer_local: bool, sheet_name: str, tab_title: str):
+    """
+    Opens (or creates) the tab; handles are reused for five minutes.
+    The lookup asks spreadsheets.get for tab properties only (title, id, grid size)
+    instead of the full metadata document that Spreadsheet.worksheet() downloads.
+    """
+    sheet = _open_sheet(prefer_local, sheet_name)
+    meta = sheet.fetch_sheet_metadata(params={"fields": "sheets.properties"})
+    for tab in meta.get("sheets", []):
+        props = tab["properties"]
+        if props["title"] == tab_title:
+            return sheet, gspread.Worksheet(sheet, props, sheet.id, sheet.client)
+    worksheet = sheet.add_worksheet(title=tab_title, rows=5000, cols=len(SHEET_HEADERS))
+    return sheet, worksheet
+
+def _header_row(sheet, tab_title: str):
+    """A1:G1 of a tab (None when empty); a one-range read, so existing rows are never downloaded."""
+    return sheet.values_get(absolute_range_name(tab_title, "A1:G1")).get("values")
+
+def _reset_requests(sheet_id: int, data_rows: Iterable[Sequence[str]]) -> List[dict]:
+    """
+    batchUpdate requests that blank every cell value of a tab and then write
+    data_rows (any iterable, consumed once) from A1. Values are sent as plain strings (same as RAW input).
+    """
+    cell_rows = [{"values": [{"userEnteredValue": {"stringValue": v}} for v in row]} for row in data_rows]
+    return [
+        {"updateCells": {"range": {"sheetId": sheet_id}, "fields": "userEnteredValue"}},
+        {"updateCells": {
+            "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0},
+            "rows": cell_rows,
+            "fields": "userEnteredValue",
+        }},
+    ]
+
+# Sheets allows 60 write requests/min per user, and every session shares one service
+# account, so writes are spaced process-wide rather than per session.
+SHEETS_MIN_WRITE_INTERVAL_S = 1.1
+
+@st.cache_resource(show_spinner=False)
+def _sheets_write_gate() -> dict:
+    return {"lock": threading.Lock(), "last": 0.0}
+
+def sheets_write(fn, *args, **kwargs):
+    """Runs one Sheets write call, first waiting (plus up to 0.1 s jitter) until the previous one is far enough back."""
+    gate = _sheets_write_gate()
+    with gate["lock"]:
+        # Jitter only ever adds to the interval, so writes are never closer than 1.1 s (< 60/min)
+        wait = gate["last"] + SHEETS_MIN_WRITE_INTERVAL_S + random.uniform(0, 0.1) - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            gate["last"] = time.monotonic()
 
+# --- Sheets settings (fragment, like the limits below; read back through their keys)
+@st.fragment
+def render_sheet_settings():
     with st.container(border=True):
         st.markdown("**Google Sheets**")
-        IS_CLOUD = bool(os.environ.get("STREAMLIT_RUNTIME"))
-        prefer_local = st.toggle("Use local credentials.json", value=not IS_CLOUD)
-        SHEET_NAME = st.text_input("Spreadsheet name", value="depop_scraper", help="Name of your Google Sheet")
-        RESET_SHEET = st.toggle("Clear sheet before writing", value=False)
+        st.toggle("Use local credentials.json", value=not IS_CLOUD, key="prefer_local")
+        st.text_input("Spreadsheet name", value="depop_scraper", help="Name of your Google Sheet", key="SHEET_NAME")
+        st.toggle("Clear sheet before writing", value=False, key="RESET_SHEET")
 
+# --- Scrape limits (fragment: dragging these reruns only this block, not auth/results)
+@st.fragment
+def render_limits():
     with st.container(border=True):
         st.markdown("**Performance Limits**")
-        MAX_ITEMS = st.number_input("Max items to scrape", min_value=100, max_value=20000, value=3000, step=100)
-        MAX_DURATION_S = st.number_input("Timeout (seconds)", min_value=60, max_value=3600, value=900, step=30)
+        st.number_input("Max items to scrape", min_value=100, max_value=20000, value=3000, step=100, key="MAX_ITEMS")
+        st.number_input("Timeout (seconds)", min_value=60, max_value=3600, value=900, step=30, key="MAX_DURATION_S")
 
     with st.container(border=True):
         st.markdown("**Deep Fetch Settings**")
-        DEEP_FETCH_MAX = st.number_input("Max items for deep fetch", min_value=50, max_value=5000, value=1000, step=50)
-        DEEP_FETCH_CONCURRENCY = st.slider("Concurrent requests", 1, 6, 3)
-        DEEP_FETCH_DELAY_MIN, DEEP_FETCH_DELAY_MAX = st.slider("Request delay (ms)", 200, 4000, (800, 1600))
+        st.number_input("Max items for deep fetch", min_value=50, max_value=5000, value=1000, step=50, key="DEEP_FETCH_MAX")
+        st.slider("Concurrent requests", 1, 6, 3, key="DEEP_FETCH_CONCURRENCY")
+        st.slider("Request delay (ms)", 200, 4000, (800, 1600), key="DEEP_FETCH_DELAY")
+
+        st.number_input("Max scroll rounds", min_value=10, max_value=2000, value=400, step=10, key="MAX_ROUNDS")
+        st.number_input("Warmup rounds", min_value=0, max_value=100, value=6, step=1, key="WARMUP_ROUNDS")
+        st.number_input("Stop after N idle rounds", min_value=2, max_value=30, value=6, step=1, key="IDLE_ROUNDS")
+        st.number_input("Network check interval", min_value=5, max_value=60, value=12, step=1, key="NETWORK_IDLE_EVERY")
+        st.number_input("Network timeout (ms)", min_value=1000, max_value=20000, value=5000, step=500, key="NETWORK_IDLE_TIMEOUT")
+        st.slider("Scroll pause range (ms)", 200, 1500, (500, 900), key="PAUSE")
+
+def read_limits() -> dict:
+    """Scraper limits from the render_limits widgets (read via their session_state keys)."""
+    ss = st.session_state
+    delay_min, delay_max = ss["DEEP_FETCH_DELAY"]
+    pause_min, pause_max = ss["PAUSE"]
+    return dict(
+        MAX_ITEMS=int(ss["MAX_ITEMS"]),
+        MAX_DURATION_S=int(ss["MAX_DURATION_S"]),
+        DEEP_FETCH_MAX=int(ss["DEEP_FETCH_MAX"]),
+        DEEP_FETCH_CONCURRENCY=int(ss["DEEP_FETCH_CONCURRENCY"]),
+        DEEP_FETCH_DELAY_MIN=int(delay_min),
+        DEEP_FETCH_DELAY_MAX=int(delay_max),
+        MAX_ROUNDS=int(ss["MAX_ROUNDS"]),
+        WARMUP_ROUNDS=int(ss["WARMUP_ROUNDS"]),
+        IDLE_ROUNDS=int(ss["IDLE_ROUNDS"]),
+        NETWORK_IDLE_EVERY=int(ss["NETWORK_IDLE_EVERY"]),
+        NETWORK_IDLE_TIMEOUT=int(ss["NETWORK_IDLE_TIMEOUT"]),
+        PAUSE_MIN=int(pause_min),
+        PAUSE_MAX=int(pause_max),
+    )
+
+# --- Sidebar Configuration
+with st.sidebar:
+    st.markdown("#### ⚙️ Settings")
+
+    render_sheet_settings()
+    render_limits()
+    CLEAR_SCRAPE_CACHE = st.button(
+        "🧹 Clear cached results", use_container_width=True,
+        help=f"Identical searches reuse their results for {SCRAPE_CACHE_TTL_S // 60} minutes",
+    )
 
-        MAX_ROUNDS = st.number_input("Max scroll rounds", min_value=10, max_value=2000, value=400, step=10)
-        WARMUP_ROUNDS = st.number_input("Warmup rounds", min_value=0, max_value=100, value=6, step=1)
-        IDLE_ROUNDS = st.number_input("Stop after N idle rounds", min_value=2, max_value=30, value=6, step=1)
-        NETWORK_IDLE_EVERY = st.number_input("Network check interval", min_value=5, max_value=60, value=12, step=1)
-        NETWORK_IDLE_TIMEOUT = st.number_input("Network timeout (ms)", min_value=1000, max_value=20000, value=5000, step=500)
-        PAUSE_MIN, PAUSE_MAX = st.slider("Scroll pause range (ms)", 200, 1500, (500, 900))
+prefer_local = st.session_state["prefer_local"]
+SHEET_NAME = st.session_state["SHEET_NAME"]
+RESET_SHEET = st.session_state["RESET_SHEET"]
 
 # --- Main Application Layout
 render_header()
 render_search_controls()
+# One-shot: True only on the full rerun the Start button requested, never persisted
+run_clicked = st.session_state.pop("run_requested", False)
 render_info_section()
 
-# --- Google Sheets Authentication
-gc = None
-if authorize_gspread:
+if run_clicked and not chromium_ready():
+    st.warning("⏳ Chromium is still installing — try again in a moment.")
+    run_clicked = False
+
+# --- Google Sheets Authentication (first needed on Run, so plain reruns skip it)
+def connect_sheets():
+    """Cached gspread client for the current credential preference, or None; records status for the health tab."""
+    if not authorize_gspread:
+        return None
+    st.session_state["creds_checked"] = True
     try:
-        gc = authorize_gspread(prefer_local=prefer_local)
+        gc = get_gspread_client(prefer_local)
         st.session_state["secrets_ok"] = not prefer_local
         st.session_state["local_creds_ok"] = prefer_local
+        return gc
     except Exception as e:
         st.session_state["secrets_ok"] = False
         st.session_state["local_creds_ok"] = False
         st.info(f"💡 Google Sheets integration not available: {e}")
+        return None
 
 # -------------------- RUN SCRAPING PROCESS (sync + async safe) --------------------
 
-# Bounded log helper (prevents memory blowups)
+# Log lines for the current run go into a bounded deque (O(1) appends, oldest lines
+# rotate out) that is handed to session_state once, when the run finishes.
 MAX_LOG_LINES = 400
+_run_logs: deque = deque(maxlen=MAX_LOG_LINES)
 def log(msg: str):
     ts = time.strftime("%H:%M:%S")
-    logs = st.session_state.get("logs", [])
-    logs.append(f"{ts} - {msg}")
-    if len(logs) > MAX_LOG_LINES:
-        logs = logs[-MAX_LOG_LINES:]
-    st.session_state["logs"] = logs
+    _run_logs.append(f"{ts} - {msg}")
+
+SCRAPE_GRACE_S = 120  # on top of MAX_DURATION_S before the app stops waiting for a scrape
+
+@st.cache_resource(show_spinner=False)
+def _scrape_loop() -> asyncio.AbstractEventLoop:
+    """One event loop per process, run forever in a daemon thread; scrapes are submitted to it."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="scrape-loop", daemon=True).start()
+    return loop
 
 def run_scraper_safe(query: str, deep: bool, limits: dict):
     """
-    Calls scrape_depop whether it's sync or async.
-    Works even if a loop is already running (e.g., some Streamlit setups).
+    Runs the scraper coroutine on the shared background loop and waits for it.
+    Works even if the calling thread already has a running loop, and no loop is
+    built and torn down per run.
     """
-    result = scrape_depop(query, deep=deep, limits=limits)
-    if asyncio.iscoroutine(result):
-        try:
-            return asyncio.run(result)
-        except RuntimeError:
-            # If there's already a running event loop, use a dedicated one.
-            loop = asyncio.new_event_loop()
-            try:
-                return loop.run_until_complete(result)
-            finally:
-                loop.close()
-    return result
-
-if st.session_state.get("run"):
-    st.session_state["logs"] = []  # reset each run
-
-    # Prepare configuration
-    limits = dict(
-        MAX_ITEMS=int(MAX_ITEMS),
-        MAX_DURATION_S=int(MAX_DURATION_S),
-        DEEP_FETCH_MAX=int(DEEP_FETCH_MAX),
-        DEEP_FETCH_CONCURRENCY=int(DEEP_FETCH_CONCURRENCY),
-        DEEP_FETCH_DELAY_MIN=int(DEEP_FETCH_DELAY_MIN),
-        DEEP_FETCH_DELAY_MAX=int(DEEP_FETCH_DELAY_MAX),
-        MAX_ROUNDS=int(MAX_ROUNDS),
-        WARMUP_ROUNDS=int(WARMUP_ROUNDS),
-        IDLE_ROUNDS=int(IDLE_ROUNDS),
-        NETWORK_IDLE_EVERY=int(NETWORK_IDLE_EVERY),
-        NETWORK_IDLE_TIMEOUT=int(NETWORK_IDLE_TIMEOUT),
-        PAUSE_MIN=int(PAUSE_MIN),
-        PAUSE_MAX=int(PAUSE_MAX),
+    future = asyncio.run_coroutine_threadsafe(
+        scrape_depop_async(query, deep=deep, limits=limits), _scrape_loop()
     )
+    try:
+        return future.result(timeout=limits["MAX_DURATION_S"] + SCRAPE_GRACE_S)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+class _NoRows(Exception):
+    """Raised inside cached_scrape so an empty scrape isn't cached (failures already raise ScrapeFailed)."""
+
+@st.cache_data(ttl=SCRAPE_CACHE_TTL_S, max_entries=16, show_spinner=False)
+def cached_scrape(query: str, deep: bool, limits_items: tuple) -> Tuple[List[tuple], int]:
+    result = run_scraper_safe(query, deep=deep, limits=dict(limits_items))
+    row_tuples, brand_count = finalize_rows(result) if isinstance(result, list) else ([], 0)
+    if not row_tuples:
+        raise _NoRows
+    return row_tuples, brand_count
+
+if CLEAR_SCRAPE_CACHE:
+    cached_scrape.clear()
+    st.toast("Cached scrape results cleared")
+
+if run_clicked:
+    # Prepare configuration
+    limits = read_limits()
+    # Query-derived names, computed once per run
+    query = st.session_state.query
+    tab_title = query.strip()[:99] or "Results"  # Sheets caps tab titles at 100 chars
+    csv_name = f"depop_{query.replace(' ', '_')}.csv"
 
-    rows: List[Dict] = []  # always define
+    row_tuples: List[tuple] = []  # always define
+    brand_count = 0
 
-    if scrape_depop is None:
+    if scrape_depop_async is None:
         log("Scraper module not available - generating sample data")
-        rows = [{
+        row_tuples, brand_count = finalize_rows([{
             "platform": "Depop",
             "brand": "Supreme",
-            "item_name": f"{st.session_state.query} (sample)",
+            "item_name": f"{query} (sample)",
             "price": "$199",
             "size": "L",
             "condition": "Good condition",
-            "link": f"https://www.depop.com/search/?q={st.session_state.query.replace(' ','%20')}",
-        }]
+            "link": f"https://www.depop.com/search/?q={quote_plus(query)}",
+        }])
     else:
-        with st.spinner(f"🔍 Scraping Depop for '{st.session_state.query}'..."):
-            log(f"Starting scrape for '{st.session_state.query}' (max {MAX_ITEMS} items, deep fetch: {st.session_state.deep})")
+        with st.spinner(f"🔍 Scraping Depop for '{query}'..."):
+            log(f"Starting scrape for '{query}' (max {limits['MAX_ITEMS']} items, deep fetch: {st.session_state.deep})")
             t0 = time.time()
             try:
-                result = run_scraper_safe(
-                    st.session_state.query,
-                    deep=st.session_state.deep,
-                    limits=limits,
-                )
-                rows = result if isinstance(result, list) else []
-                if not rows:
-                    log("⚠️ Scraper returned no rows (None or unexpected type).")
+                row_tuples, brand_count = cached_scrape(query, st.session_state.deep, tuple(sorted(limits.items())))
+            except _NoRows:
+                log("⚠️ Scraper returned no rows (None or unexpected type).")
             except Exception as e:
-                rows = []
                 log(f"❌ Scraping failed: {e}")
                 st.error(f"Scraping failed: {e}")
             dur = time.time() - t0
-            log(f"✅ Scraping completed in {dur:.1f}s - found {len(rows)} items")
+            log(f"✅ Scraping completed in {dur:.1f}s - found {len(row_tuples)} items")
+
+    # Persist results so later reruns (sidebar tweaks, tab clicks) keep showing them
+    st.session_state["row_tuples"] = row_tuples
+    st.session_state["brand_count"] = brand_count
+    st.session_state["last_sheet"] = SHEET_NAME
+    st.session_state["csv_name"] = csv_name
+    st.session_state["scrape_id"] = uuid.uuid4().hex  # cache key for the table/CSV builders
 
     # Save to Google Sheets
-    if gc and rows:
+    gc = connect_sheets() if row_tuples else None
+    if gc:
         with st.spinner("💾 Saving to Google Sheets..."):
             try:
-                import gspread
-                headers = ["Platform", "Brand", "Item Name", "Price", "Size", "Condition", "Link"]
-
-                # Open or create spreadsheet
-                try:
-                    sheet = gc.open(SHEET_NAME)
-                except gspread.SpreadsheetNotFound:
-                    sheet = gc.create(SHEET_NAME)
-                    log(f"Created new spreadsheet: {SHEET_NAME}")
-
-                # Create or get worksheet
-                tab_title = st.session_state.query[:99] or "Results"
+                # Open (cached) spreadsheet/tab and read its header row
                 try:
-                    worksheet = sheet.worksheet(tab_title)
-                except gspread.WorksheetNotFound:
-                    worksheet = sheet.add_worksheet(title=tab_title, rows="5000", cols=str(len(headers)))
-                    worksheet.append_row(headers)
-                    log(f"Created new worksheet: {tab_title}")
-
-                # Clear sheet if requested
-                if RESET_SHEET or not worksheet.get_all_values():
-                    worksheet.clear()
-                    worksheet.append_row(headers)
-                    log("Cleared worksheet and added headers")
-
-                # Prepare and batch insert data
-                data_rows = [[
-                    row.get("platform", "Depop"),
-                    row.get("brand", ""),
-                    row.get("item_name", ""),
-                    row.get("price", ""),
-                    row.get("size", ""),
-                    row.get("condition", ""),
-                    row.get("link", ""),
-                ] for row in rows]
-
-                BATCH_SIZE = 300
-                total_batches = max(1, (len(data_rows) + BATCH_SIZE - 1) // BATCH_SIZE)
-                for i in range(0, len(data_rows), BATCH_SIZE):
-                    batch = data_rows[i:i + BATCH_SIZE]
-                    worksheet.append_rows(batch, value_input_option="RAW")
-                    log(f"Uploaded batch {i // BATCH_SIZE + 1}/{total_batches}")
-
-                st.success(f"✅ Successfully saved {len(rows)} items to **{SHEET_NAME} / {tab_title}**")
+                    sheet, worksheet = _get_ws(prefer_local, SHEET_NAME, tab_title)
+                    header_row = _header_row(sheet, tab_title)
+                except gspread.exceptions.APIError as e:
+                    # Cached handle went stale (tab deleted or renamed); reopen once.
+                    # A 401 means the cached client's credentials were rejected, so re-authorize too.
+                    if e.code == 401:
+                        clear_cached_clients()
+                    _open_sheet.clear()
+                    _get_ws.clear()
+                    sheet, worksheet = _get_ws(prefer_local, SHEET_NAME, tab_title)
+                    header_row = _header_row(sheet, tab_title)
+
+                if RESET_SHEET:
+                    # Reset: clear + headers + data as one atomic batchUpdate
+                    needed_rows = len(row_tuples) + 1  # + header
+                    if needed_rows > worksheet.row_count:
+                        sheets_write(worksheet.add_rows, needed_rows - worksheet.row_count)
+                    data_rows = chain((SHEET_HEADERS,), row_tuples)  # header streamed ahead of the rows, no list copy
+                    sheets_write(sheet.batch_update, {"requests": _reset_requests(worksheet.id, data_rows)})
+                    log(f"Cleared worksheet and wrote headers + {len(row_tuples)} rows")
+                else:
+                    if not header_row:
+                        # Header-less tab: write only A1:G1, leaving any rows below it untouched
+                        sheets_write(
+                            sheet.values_update,
+                            absolute_range_name(tab_title, "A1:G1"),
+                            params={"valueInputOption": "RAW"},
+                            body={"values": [SHEET_HEADERS]},
+                        )
+                        log("Wrote headers to an empty first row")
+                    # One values.append after the existing table; INSERT_ROWS grows the grid as needed
+                    resp = sheets_write(
+                        sheet.values_append,
+                        absolute_range_name(tab_title, "A1"),
+                        params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+                        body={"values": row_tuples},
+                    )
+                    log(f"Uploaded {len(row_tuples)} rows ({resp.get('updates', {}).get('updatedRange', tab_title)})")
+
+                st.success(f"✅ Successfully saved {len(row_tuples)} items to **{SHEET_NAME} / {tab_title}**")
                 log(f"✅ Data saved to Google Sheets: {SHEET_NAME} / {tab_title}")
 
             except Exception as e:
                 st.warning(f"⚠️ Could not save to Google Sheets: {e}")
                 log(f"❌ Google Sheets save failed: {e}")
 
-    # Display results
-    if rows:
-        render_results(rows, SHEET_NAME)
-    else:
-        st.info("No data to display. Try adjusting your search terms or settings.")
+    st.session_state["logs"] = _run_logs  # replaces the previous run's log
+
+# --- Display results from the last scrape (survives reruns until the next one)
+if st.session_state.row_tuples:
+    render_results(st.session_state["scrape_id"], st.session_state.row_tuples, st.session_state["last_sheet"],
+                   st.session_state["brand_count"], st.session_state["csv_name"])
+elif run_clicked:
+    st.info("No data to display. Try adjusting your search terms or settings.")
@@ -7,23 +7,13 @@ try:
 except Exception:
     st = None  # allow import without Streamlit (e.g., plain scripts/tests)
 
-def _badge(ok: bool, source: str, note: str | None = None):
-    if st is None:
-        return
-    if ok:
-        st.success
-    else:
-        st.error
-        if note:
-            st.caption(note)
-
-def authorize_gspread(prefer_local: bool = False) -> gspread.Client:
+def _build_client(prefer_local: bool) -> tuple[gspread.Client, str]:
     """
+    Builds an authorized client and returns it with a label for the credential source.
     Priority:
       - In Cloud: [google_service_account] table → GOOGLE_SERVICE_ACCOUNT JSON string → (no local)
       - Locally (prefer_local=True): credentials.json → [google_service_account] → GOOGLE_SERVICE_ACCOUNT
       - Locally (prefer_local=False): [google_service_account] → GOOGLE_SERVICE_ACCOUNT → credentials.json
-    Shows a badge indicating which source was used (when Streamlit is available).
     """
     IS_CLOUD = bool(os.environ.get("STREAMLIT_RUNTIME"))
 
@@ -48,8 +38,7 @@ def authorize_gspread(prefer_local: bool = False) -> gspread.Client:
         try:
             creds_dict = dict(st.secrets["google_service_account"])
             client = gspread.service_account_from_dict(creds_dict)
-            _badge(True, "[google_service_account] (TOML table)")
-            return client
+            return client, "[google_service_account] (TOML table)"
         except Exception as e:
             if st: st.warning(f"Credential source 'table' failed: {e}")
 
@@ -58,8 +47,7 @@ def authorize_gspread(prefer_local: bool = False) -> gspread.Client:
         try:
             creds_dict = json.loads(st.secrets["GOOGLE_SERVICE_ACCOUNT"])
             client = gspread.service_account_from_dict(creds_dict)
-            _badge(True, "GOOGLE_SERVICE_ACCOUNT (JSON string)")
-            return client
+            return client, "GOOGLE_SERVICE_ACCOUNT (JSON string)"
         except Exception as e:
             if st: st.warning(f"Credential source 'json' failed: {e}")
 
@@ -67,11 +55,32 @@ def authorize_gspread(prefer_local: bool = False) -> gspread.Client:
     if "local" in order and os.path.exists("credentials.json"):
         try:
             client = gspread.service_account(filename="credentials.json")
-            _badge(True, "credentials.json (local file)")
-            return client
+            return client, "credentials.json (local file)"
         except Exception as e:
             if st: st.warning(f"Credential source 'local' failed: {e}")
 
-    _badge(False, "none", "Add [google_service_account] in Secrets (triple-quoted private_key) "
-                          "or set GOOGLE_SERVICE_ACCOUNT as a JSON string, or place credentials.json next to app.py.")
     raise RuntimeError("No Google credentials found. Configure Secrets or add credentials.json.")
+
+# One client per process and credential preference: reruns reuse the signed-in session
+# instead of re-reading secrets and signing a fresh service-account JWT. Failures raise
+# and so are never cached.
+_cached_client = st.cache_resource(show_spinner=False)(_build_client) if st is not None else _build_client
+
+def clear_cached_clients():
+    """Drops cached clients (e.g. after Google rejects their credentials) so the next call re-authorizes."""
+    if st is not None:
+        _cached_client.clear()
+
+def authorize_gspread(prefer_local: bool = False) -> gspread.Client:
+    """
+    Authorized gspread client (cached per prefer_local when Streamlit is available).
+    When no credential source works, a setup hint is shown as a caption before re-raising.
+    """
+    try:
+        client, _source = _cached_client(prefer_local)
+    except RuntimeError:
+        if st is not None:
+            st.caption("Add [google_service_account] in Secrets (triple-quoted private_key) "
+                       "or set GOOGLE_SERVICE_ACCOUNT as a JSON string, or place credentials.json next to app.py.")
+        raise
+    return client
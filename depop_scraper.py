@@ -1,14 +1,16 @@
 # depop_scraper.py
 # Streamlit + Playwright scraper for Depop with Google Sheets output
-# Paste this entire file to avoid indentation / missing-import issues.
+# Standalone entry point (`streamlit run depop_scraper.py`); the deployed app is app.py,
+# which scrapes via depop_scraper_lib instead. Neither script imports the other; both take
+# the Chromium probe/install helpers from depop_scraper_lib.
 
-import os, sys, json, csv, io, time, random, subprocess, urllib.parse, asyncio
+import os, json, csv, io, time, random, urllib.parse, asyncio
 from typing import List, Dict
+from operator import itemgetter
 
 import streamlit as st
-import gspread
-from google.oauth2.service_account import Credentials
 from playwright.async_api import async_playwright
+from depop_scraper_lib import chromium_installed, install_chromium, playwright_version
 
 # ---------- UI text ----------
 INSTALL_TEXT = """
@@ -34,17 +36,13 @@ DEFAULT_HEADLESS = True if IS_CLOUD else False
 
 # ---------- Ensure Playwright Chromium (safe on Cloud) ----------
 @st.cache_resource(show_spinner=False)
-def _ensure_playwright():
-    try:
-        subprocess.run(
-            [sys.executable, "-m", "playwright", "install", "chromium", "--with-deps"],
-            check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-        )
-    except Exception:
-        pass
+def _ensure_playwright(playwright_version: str):
+    # Keyed by version so upgrades re-install; skip the subprocess when Chromium is already cached
+    if not chromium_installed():
+        install_chromium()
     return True
 
-_ensure_playwright()
+_ensure_playwright(playwright_version())
 
 # ---------- Sidebar controls ----------
 with st.sidebar:
@@ -71,71 +69,59 @@ with st.sidebar:
     DEEP_FETCH_DELAY_MIN, DEEP_FETCH_DELAY_MAX = st.slider("Per detail page delay (ms)", 200, 4000, (800, 1600))
 
 # ---------- Google credentials ----------
-SHEETS_SCOPE = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive",
-]
 SHEET_HEADERS = ["Platform","Brand","Item Name","Price","Size","Condition","Link"]
-
-from creds_loader import authorize_gspread  # NEW
-
-# Replace your open_worksheet() to use the shared client:
-def open_worksheet(doc_name: str, title: str, force_reset: bool = False):
+ROW_KEYS = ("platform","brand","item_name","price","size","condition","link")
+row_values = itemgetter(*ROW_KEYS)  # row dict -> tuple in SHEET_HEADERS order
+
+# creds_loader caches the authorized client per process, so reruns don't re-sign credentials.
+# creds_loader/gspread are imported here so they load on the first save, not at startup.
+def get_gspread_client(prefer_local: bool = False):
+    from creds_loader import authorize_gspread
+    return authorize_gspread(prefer_local=prefer_local)
+
+# The spreadsheet handle is shared across runs; open() is a Drive search by title.
+@st.cache_resource(ttl=300, show_spinner=False)
+def open_spreadsheet(doc_name: str):
     import gspread
-    SHEET_HEADERS = ["Platform","Brand","Item Name","Price","Size","Condition","Link"]
-
-    client = authorize_gspread()  # << use shared
+    client = get_gspread_client()
     try:
-        doc = client.open(doc_name)
+        return client.open(doc_name)
     except gspread.SpreadsheetNotFound:
-        doc = client.create(doc_name)
-
-    try:
-        ws = doc.worksheet(title[:99])
-    except gspread.WorksheetNotFound:
-        ws = doc.add_worksheet(title=title[:99], rows=5000, cols=len(SHEET_HEADERS))
-        force_reset = True
-
-    vals = ws.get_all_values()
-    if force_reset or not vals or vals[0] != SHEET_HEADERS:
-        ws.clear()
-        ws.append_row(SHEET_HEADERS)
-    return ws
-
+        return client.create(doc_name)
 
 def open_worksheet(doc_name: str, title: str, force_reset: bool = False):
-    creds = load_google_credentials()
-    client = gspread.authorize(creds)
-    # Open or create spreadsheet
-    try:
-        doc = client.open(doc_name)
-    except gspread.SpreadsheetNotFound:
-        doc = client.create(doc_name)
-    # Open or create worksheet
+    import gspread
     try:
-        ws = doc.worksheet(title[:99])
+        ws = open_spreadsheet(doc_name).worksheet(title[:99])
+    except gspread.exceptions.APIError as e:
+        # Cached handle went stale (sheet deleted or unshared); reopen once.
+        # A 401 means the cached client's credentials were rejected, so re-authorize too.
+        if e.code == 401:
+            from creds_loader import clear_cached_clients
+            clear_cached_clients()
+        open_spreadsheet.clear()
+        try:
+            ws = open_spreadsheet(doc_name).worksheet(title[:99])
+        except gspread.WorksheetNotFound:
+            ws = None
     except gspread.WorksheetNotFound:
-        ws = doc.add_worksheet(title=title[:99], rows=5000, cols=len(SHEET_HEADERS))
+        ws = None
+    if ws is None:
+        ws = open_spreadsheet(doc_name).add_worksheet(title=title[:99], rows=5000, cols=len(SHEET_HEADERS))
         force_reset = True
-    # Ensure headers
-    vals = ws.get_all_values()
-    if force_reset or not vals or vals[0] != SHEET_HEADERS:
+
+    # Header row only; get_all_values() would download the whole tab
+    if force_reset or ws.row_values(1) != SHEET_HEADERS:
         ws.clear()
-        ws.append_row(SHEET_HEADERS)
+        # Direct A1 write; append_row would make Sheets search for the table's end first
+        ws.update(values=[SHEET_HEADERS], range_name="A1:G1", value_input_option="RAW")
     return ws
 
 def save_to_google_sheets(ws, rows: List[Dict]):
-    payload = [[
-        r.get("platform","Depop"),
-        r.get("brand",""),
-        r.get("item_name",""),
-        r.get("price",""),
-        r.get("size",""),
-        r.get("condition",""),
-        r.get("link",""),
-    ] for r in rows]
+    payload = list(map(row_values, rows))  # tuples serialize as JSON arrays; no per-row list copy
     if payload:
-        ws.append_rows(payload, value_input_option="RAW")
+        # One values.append for the whole scrape; INSERT_ROWS grows the grid instead of overwriting
+        ws.append_rows(payload, value_input_option="RAW", insert_data_option="INSERT_ROWS")
 
 # ---------- Scrape helpers ----------
 def build_search_url(term: str) -> str:
@@ -172,14 +158,14 @@ EXTRACT_LIST_SCRIPT = r"""
     let price = "N/A", brand = "";
 
     if (li) {
-      const pTags = Array.from(li.querySelectorAll('p'));
-      const priceTag = pTags.find(p => currencyRe.test(p.textContent || ""));
-      if (priceTag) price = clean(priceTag.textContent);
+      // Test each <p> against currencyRe once; reuse the result for price and brand
+      const texts = Array.from(li.querySelectorAll('p'), p => clean(p.textContent)).filter(Boolean);
+      const isPrice = texts.map(t => currencyRe.test(t));
+      const priceIdx = isPrice.indexOf(true);
+      if (priceIdx >= 0) price = texts[priceIdx];
 
-      const texts = pTags.map(p => clean(p.textContent)).filter(Boolean);
       for (let i = texts.length - 1; i >= 0; i--) {
-        const t = texts[i];
-        if (!currencyRe.test(t) && t.length <= 40) { brand = t; break; }
+        if (!isPrice[i] && texts[i].length <= 40) { brand = texts[i]; break; }
       }
     }
 
@@ -591,21 +577,15 @@ if run_btn:
 
         if rows:
             st.dataframe(rows[:200])
-            output = io.StringIO()
-            writer = csv.writer(output)
+            output = io.BytesIO()
+            text = io.TextIOWrapper(output, encoding="utf-8", newline="")
+            writer = csv.writer(text)
             writer.writerow(SHEET_HEADERS)
-            for r in rows:
-                writer.writerow([
-                    r.get("platform","Depop"),
-                    r.get("brand",""),
-                    r.get("item_name",""),
-                    r.get("price",""),
-                    r.get("size",""),
-                    r.get("condition",""),
-                    r.get("link",""),
-                ])
+            writer.writerows(map(row_values, rows))
+            text.detach()
             st.download_button("Download CSV",
-                               data=output.getvalue().encode("utf-8"),
+                               data=output.getvalue(),
                                file_name=f"depop_{query.replace(' ','_')}.csv",
-                               mime="text/csv")
+                               mime="text/csv",
+                               on_click="ignore")
         status.update(label="Scrape complete", state="complete")
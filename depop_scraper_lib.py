@@ -1,12 +1,53 @@
 # depop_scraper_lib.py
 # Memory-lean Depop scraper with Playwright.
 # Public API remains: scrape_depop(term: str, deep: bool, limits: dict) -> List[Dict]
+# Callers that own an event loop can await scrape_depop_async(...) instead.
 
 from __future__ import annotations
-import os, time, asyncio
+import os, re, sys, time, asyncio, subprocess
 from typing import List, Dict, Optional
 from urllib.parse import quote_plus
 
+# ---------------- Chromium install (shared by app.py and depop_scraper.py) ----------------
+
+# Playwright's browser cache (PLAYWRIGHT_BROWSERS_PATH overrides the default location)
+BROWSER_DIR = os.environ.get("PLAYWRIGHT_BROWSERS_PATH") or os.path.expanduser("~/.cache/ms-playwright")
+
+def chromium_installed() -> bool:
+    try:
+        return any(n.startswith("chromium") for n in os.listdir(BROWSER_DIR))
+    except OSError:
+        return False
+
+def playwright_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("playwright")
+    except Exception:
+        return ""
+
+CHROMIUM_INSTALL_TIMEOUT_S = 600
+
+def install_chromium(timeout_s: float = CHROMIUM_INSTALL_TIMEOUT_S) -> None:
+    """
+    Runs `playwright install chromium`; errors and timeouts are swallowed (the launch reports them).
+    --with-deps (apt packages) is only added as root: for other users it shells out to sudo,
+    which would sit on a password prompt. stdin is closed so nothing can prompt at all.
+    """
+    cmd = [sys.executable, "-m", "playwright", "install", "chromium"]
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        cmd.append("--with-deps")
+    try:
+        subprocess.run(
+            cmd, check=False, timeout=timeout_s,
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    except Exception:
+        pass
+
+class ScrapeFailed(Exception):
+    """The search page couldn't be scraped (no browser launched, page didn't load)."""
+
 def scrape_depop(term: str, deep: bool, limits: dict) -> List[Dict]:
     """Sync wrapper. Returns a sample row on failure so UI doesn't crash."""
     try:
@@ -22,12 +63,23 @@ def scrape_depop(term: str, deep: bool, limits: dict) -> List[Dict]:
         loop = asyncio.new_event_loop()
         try:
             return loop.run_until_complete(_scrape_depop_async(term, deep, limits or {}))
+        except ScrapeFailed:
+            return [_sample_row(term)]
         finally:
             loop.close()
     except Exception:
         return [_sample_row(term)]
 
 
+async def scrape_depop_async(term: str, deep: bool, limits: dict) -> List[Dict]:
+    """
+    Async entry point for callers that run their own event loop (no per-call loop setup).
+    Unlike scrape_depop, failures raise (ScrapeFailed or the underlying error) instead of
+    returning a sample row, so callers can tell a failed scrape from real results.
+    """
+    return await _scrape_depop_async(term, deep, limits or {})
+
+
 # ---------------- Async impl ----------------
 
 from playwright.async_api import async_playwright, TimeoutError as PWTimeout
@@ -66,6 +118,11 @@ BLOCK_HOST_SUBSTR = [
 # Resource types to block (keep CSS so the DOM still lays out consistently)
 BLOCK_TYPES = {"image", "media", "font"}
 
+# Deep-fetch text scan: fields we pick out of "Label: value" lines on the product page
+DETAIL_FIELDS = ("size", "condition", "brand")
+_DETAIL_FIELD_RE = re.compile("|".join(DETAIL_FIELDS), re.I)
+_WS_RE = re.compile(r"\s+")
+
 
 async def _scrape_depop_async(query: str, deep: bool, limits: dict) -> List[Dict]:
     MAX_ITEMS        = int(limits.get("MAX_ITEMS", 200))
@@ -99,7 +156,7 @@ async def _scrape_depop_async(query: str, deep: bool, limits: dict) -> List[Dict
             except Exception:
                 continue
         if not browser:
-            return [_sample_row(query)]
+            raise ScrapeFailed("no browser could be launched")
 
         # One context, request blocking on to reduce RAM/network
         context = await browser.new_context(
@@ -125,9 +182,9 @@ async def _scrape_depop_async(query: str, deep: bool, limits: dict) -> List[Dict
         # Go to search
         try:
             await page.goto(search_url, wait_until="domcontentloaded", timeout=60000)
-        except Exception:
+        except Exception as e:
             await context.close(); await browser.close()
-            return [_sample_row(query)]
+            raise ScrapeFailed(f"search page didn't load: {e}") from e
 
         # Accept cookies if present
         await _maybe_click(page, COOKIE_SELECTORS)
@@ -138,8 +195,7 @@ async def _scrape_depop_async(query: str, deep: bool, limits: dict) -> List[Dict
             pass
 
         # Progressive scroll & collect links (no element snapshots)
-        links = await _collect_links(page, SCROLL_ROUNDS, CARD_SELECTORS, PAUSE_MS, NETWORK_IDLE_MS)
-        links = list(dict.fromkeys(links))[:MAX_ITEMS]  # dedupe, cap
+        links = await _collect_links(page, SCROLL_ROUNDS, CARD_SELECTORS, PAUSE_MS, NETWORK_IDLE_MS, MAX_ITEMS)
 
         # Reuse a single detail page to keep memory low
         detail = await context.new_page()
@@ -174,9 +230,12 @@ async def _maybe_click(page, selectors: List[str]) -> None:
         except Exception:
             pass
 
-async def _collect_links(page, rounds: int, selectors: List[str], pause_ms: int, idle_ms: int) -> List[str]:
+async def _collect_links(page, rounds: int, selectors: List[str], pause_ms: int, idle_ms: int,
+                         max_items: int) -> List[str]:
+    """Filters to product links, dedupes and caps in the same pass that reads the hrefs."""
     links: List[str] = []
     seen = set()
+    links_append, seen_add = links.append, seen.add
 
     # Ensure at least something is attached
     attached = False
@@ -201,10 +260,12 @@ async def _collect_links(page, rounds: int, selectors: List[str], pause_ms: int,
                     if not href:
                         continue
                     link = f"https://www.depop.com{href}" if href.startswith("/") else href
-                    if link in seen:
+                    if "/products/" not in link or link in seen:
                         continue
-                    seen.add(link)
-                    links.append(link)
+                    seen_add(link)
+                    links_append(link)
+                    if len(links) >= max_items:
+                        return links
             except Exception:
                 pass
 
@@ -245,7 +306,7 @@ async def _read_detail(page, link: str, deep: bool, timeout_ms: int) -> Dict:
             try:
                 el = page.locator(sel).first
                 await el.wait_for(state="attached", timeout=2000)
-                txt = (await el.inner_text()).strip()
+                txt = _squash_ws(await el.inner_text())
                 if txt:
                     out["item_name"] = txt
                     break
@@ -257,7 +318,7 @@ async def _read_detail(page, link: str, deep: bool, timeout_ms: int) -> Dict:
             try:
                 el = page.locator(sel).first
                 await el.wait_for(state="attached", timeout=2000)
-                txt = (await el.inner_text()).strip()
+                txt = _squash_ws(await el.inner_text())
                 if any(c in txt for c in ("$", "£", "€")):
                     out["price"] = txt
                     break
@@ -269,19 +330,17 @@ async def _read_detail(page, link: str, deep: bool, timeout_ms: int) -> Dict:
             try:
                 body = await page.inner_text("body")
                 for line in body.splitlines():
-                    s = line.strip()
-                    if not s:
+                    # One compiled scan per line; most lines mention none of the fields
+                    hits = {m.lower() for m in _DETAIL_FIELD_RE.findall(line)}
+                    if not hits:
                         continue
-                    low = s.lower()
-                    if "size" in low and not out["size"]:
-                        parts = s.split(":", 1)
-                        out["size"] = parts[1].strip() if len(parts) > 1 else s
-                    if "condition" in low and not out["condition"]:
-                        parts = s.split(":", 1)
-                        out["condition"] = parts[1].strip() if len(parts) > 1 else s
-                    if "brand" in low and not out["brand"]:
-                        parts = s.split(":", 1)
-                        out["brand"] = parts[1].strip() if len(parts) > 1 else s
+                    s = line.strip()
+                    for field in DETAIL_FIELDS:
+                        if field in hits and not out[field]:
+                            parts = s.split(":", 1)
+                            out[field] = parts[1].strip() if len(parts) > 1 else s
+                    if out["size"] and out["condition"] and out["brand"]:
+                        break
             except Exception:
                 pass
 
@@ -290,6 +349,14 @@ async def _read_detail(page, link: str, deep: bool, timeout_ms: int) -> Dict:
     return out
 
 
+def _squash_ws(text: str) -> str:
+    """Strips and collapses whitespace runs; the regex only runs when there is something to collapse."""
+    text = text.strip()
+    if "  " in text or "\n" in text or "\t" in text:
+        return _WS_RE.sub(" ", text)
+    return text
+
+
 def _sample_row(term: str) -> Dict:
     return {
         "platform": "Depop",